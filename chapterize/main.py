@@ -1,10 +1,11 @@
 """Main File - prompts user for what they actually want to do"""
 
 import os
+import sys
 import asyncio
 import click
 from typing import Optional
-from const import console
+from chapterize.const import console
 from chapterize.audiobookshelf import ABSUpdater
 from chapterize.transcribe import BookTranscriber
 
@@ -24,6 +25,78 @@ def cli():
     """Book processing CLI application."""
     pass
 
+def transcribe_options(command):
+    """Whisper model and decoding options shared by the transcribing commands."""
+    options = [
+        click.option(
+            '--model',
+            default='distil-small.en',
+            help='Whisper model to use tiny, tiny.en, base, base.en, small, small.en, distil-small.en, medium, medium.en, distil-medium.en, large-v1, large-v2, large-v3, large, distil-large-v2, distil-large-v3, large-v3-turbo, or turbo',
+            envvar='WHISPER_MODEL',
+            show_envvar = True
+        ),
+        click.option(
+            '--device',
+            default='auto',
+            help='Device to use (cpu, cuda, auto)',
+            show_envvar=True
+
+        ),
+        click.option(
+            '--compute-type',
+            default='auto',
+            type=click.Choice(['auto', 'default', 'int8', 'int8_float32', 'int8_float16', 'int8_bfloat16',
+                               'int16', 'float16', 'bfloat16', 'float32']),
+            help='CTranslate2 compute type. auto picks the fastest type supported by the device, '
+                 'int8_float16 keeps int8 weights on a GPU to save VRAM',
+        ),
+        click.option(
+            '--num-workers',
+            default=8,
+            type=click.IntRange(min=1),
+            help='Number of audio files to transcribe in parallel on the shared model',
+        ),
+        click.option(
+            '--cpu-threads',
+            default=0,
+            type=int,
+            help='Number of CPU threads (0 uses every core when running on the CPU)',
+        ),
+        click.option(
+            '--batch-size',
+            default=0,
+            type=int,
+            help='Number of audio chunks to transcribe together (0 uses 16 on a GPU and 1 on a CPU, 1 disables batching)',
+        ),
+        click.option(
+            '--beam-size',
+            default=1,
+            type=int,
+            help='Beam size for decoding (1 is greedy and fastest, try 5 for noisy audio)',
+        ),
+        click.option(
+            '--processes',
+            default=1,
+            type=click.IntRange(min=1),
+            help='Number of processes that each load their own model and transcribe one file at a time '
+                 '(1 keeps every file on the shared model)',
+        ),
+        click.option(
+            '--audio-cache',
+            type=click.Path(file_okay=False),
+            envvar='CHAPTERIZE_AUDIO_CACHE',
+            help='Directory to keep decoded audio in, so running a book again skips decoding it',
+        ),
+        click.option(
+            '--no-tui',
+            is_flag=True,
+            help='Disable the live progress display (it is also off when output is not a terminal)',
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
 @cli.command()
 @click.option(
     '--dir',
@@ -32,42 +105,48 @@ def cli():
     callback=validate_directory,
     show_envvar=True
 )
-@click.option(
-    '--model',
-    default='tiny.en',
-    help='Whisper model to use tiny, tiny.en, base, base.en, small, small.en, distil-small.en, medium, medium.en, distil-medium.en, large-v1, large-v2, large-v3, large, distil-large-v2, distil-large-v3, large-v3-turbo, or turbo',
-    envvar='WHISPER_MODEL',
-    show_envvar = True
-)
-@click.option(
-    '--device',
-    default='auto',
-    help='Device to use (cpu, cuda, auto)',
-    show_envvar=True
-
-)
-@click.option(
-    '--num-workers',
-    default=8,
-    type=int,
-    help='Number of workers for parallel processing',
-)
-@click.option(
-    '--cpu-threads',
-    default=0,
-    type=int,
-    help='Number of CPU threads (0 uses default)',
-)
-def detect(dir: str, model: str, device: str, num_workers: int, cpu_threads: int):
+@transcribe_options
+def detect(dir: str, **options):
     """Detect and process books in the specified directory."""
-    asyncio.run(async_detect(dir, model, device, num_workers, cpu_threads))
+    asyncio.run(async_detect(dir, options))
 
-async def async_detect(dir: str, model: str, device: str, num_workers: int, cpu_threads: int):
+async def async_detect(dir: str, options: dict):
     """Async implementation of detect command."""
     console.print(f"[green]Running detection mode on directory:[/green] {dir}")
-    bt = BookTranscriber(dir)
+    bt = BookTranscriber(dir, **options)
     await bt.transcribe()
 
+@cli.command()
+@transcribe_options
+def serve(**options):
+    """Keep the model loaded and detect chapters for every book directory read from stdin.
+
+    Reads one directory per line and answers each with "OK <dir>" or "ERR <dir>" on stdout,
+    for example: echo ./audio/my_book | chapterize serve
+    """
+    asyncio.run(async_serve(options))
+
+async def async_serve(options: dict):
+    """Async implementation of serve command."""
+    # Keep stdout for the status lines, everything else goes to stderr
+    console.file = sys.stderr
+    for line in sys.stdin:
+        directory = line.strip()
+        if not directory:
+            continue
+        try:
+            if not os.path.isdir(directory):
+                raise NotADirectoryError(f"Directory does not exist: {directory}")
+            # The loaded model is cached, so only the first book pays for loading it as long as
+            # it is not resized to each book's file count
+            bt = BookTranscriber(directory, fit_model_to_book=False, **options)
+            await bt.transcribe()
+        except Exception as e:
+            console.print(f"[red]Failed to process {directory}:[/red] {e}")
+            click.echo(f"ERR {directory}")
+        else:
+            click.echo(f"OK {directory}")
+
 @cli.command()
 @click.option(
     '--dir',
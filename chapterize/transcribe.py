@@ -1,13 +1,24 @@
+import contextlib
+import functools
+import hashlib
+import itertools
+import multiprocessing
 import os
-from glob import glob
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, ContextManager, Optional
 
 import aiofiles
 import asyncio
-from faster_whisper import WhisperModel, BatchedInferencePipeline
+import ctranslate2
+import numpy as np
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
 from faster_whisper.transcribe import Segment, TranscriptionInfo
 from rich.progress import Progress, TextColumn, BarColumn, TaskProgressColumn, TimeRemainingColumn, SpinnerColumn
 from rich.live import Live
-from rich.console import Console  # Changed this line
 
 # https://api.audiobookshelf.org/#update-a-library-item-39-s-audio-tracks
 #POST http://abs.example.com/api/items/<ID>/chapters
@@ -22,200 +33,469 @@ from rich.console import Console  # Changed this line
 #end	Float	When in the book (in seconds) the chapter ends.
 #title	String	The title of the chapter.
 
-from chapterize.utils import is_chapter, format_timestamp_srt
+from chapterize.const import console
+from chapterize.utils import AudioFile, is_chapter, format_timestamp_srt
+
+# Number of SRT entries to collect before writing them to disk
+SRT_FLUSH_SEGMENTS = 128
+# Batch size used on CUDA devices when none is given
+DEFAULT_GPU_BATCH_SIZE = 16
+# Suffix of transcription files that are still being written
+PART_SUFFIX = ".part"
+# Audio files that make up a book, and the part files an interrupted detection run leaves behind
+AUDIO_EXTENSIONS = frozenset({'.mp3', '.ogg', '.m4a', '.wav', '.flac', '.m4b'})
+DETECTION_SUFFIXES = (f'.srt{PART_SUFFIX}', f'.chapters{PART_SUFFIX}')
+# Minimum number of seconds between progress bar updates
+PROGRESS_INTERVAL = 1.0
+# Prompt that nudges whisper towards writing out chapter headings
+INITIAL_PROMPT = "This is an audiobook with chapters."
+# Silero VAD settings used to skip the silent parts of the audio
+VAD_PARAMETERS = {
+    "min_silence_duration_ms": 500,
+    "speech_pad_ms": 200,
+}
+
+def resolve_device(device: str) -> str:
+    """Resolve "auto" to the device CTranslate2 will actually run on."""
+    if device == "auto":
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    return device
+
+
+@functools.lru_cache(maxsize=1)
+def load_model(model: str = "distil-small.en",
+               device: str = "auto",
+               compute_type: str = "auto",
+               num_workers: int = 8,
+               cpu_threads: int = 0) -> WhisperModel:
+    # Cached so repeated books in one process (e.g. chapterize serve) reuse the loaded model.
+    # Each of the num_workers concurrent transcriptions gets its own share of the cores,
+    # CTranslate2 only uses a few intra-op threads by default
+    if cpu_threads == 0 and resolve_device(device) == "cpu":
+        cpu_threads = max(1, (os.cpu_count() or 1) // num_workers)
+    whisper_model = WhisperModel(
+        model,
+        device=device,
+        # "auto" lets CTranslate2 pick the fastest type the device supports (int8 on CPU, float16 family on CUDA)
+        compute_type=compute_type,
+        num_workers=num_workers,
+        cpu_threads=cpu_threads
+    )
+    # Show what "auto" resolved to, e.g. int8 on a CPU or int8_float16 on a GPU
+    console.print(f"Loaded [green]{model}[/green] on {whisper_model.model.device} "
+                  f"({whisper_model.model.compute_type}, {num_workers} workers, {cpu_threads or 'default'} threads)")
+    return whisper_model
 
-console = Console()
 
 class FileTranscriber:
-    def __init__(self,
-                 audio_file: str,
-                 model: str = "tiny.en",
-                 device: str = "auto",
-                 num_workers: int = 8,
-                 cpu_threads: int = 0) -> None:
-        self.batch_info = None
-        self.info = None
-        self.audio_file = audio_file
-        self.audio_directory = os.path.dirname(audio_file)
-        self.parent_directory = os.path.basename(self.audio_directory)
+    """Transcribes a single audio file into its own .srt.part/.chapters.part files, timed from the start of that file.
 
-        self.chapter_file = os.path.join(self.audio_directory, self.parent_directory + ".chapters")
-        self.srt_file = os.path.join(self.audio_directory, self.parent_directory + ".srt")
-        self.batch_srt_file = os.path.join(self.audio_directory, self.parent_directory + ".batch.srt")
+    The part files hold one tab separated segment per line (start, end and text for the .srt.part, start and
+    text for the .chapters.part), with times as plain seconds so the book merge can number and shift them
+    without parsing SRT back.
+    """
 
+    def __init__(self,
+                 audio_file: AudioFile,
+                 model: WhisperModel,
+                 batch_size: int = 1,
+                 beam_size: int = 1,
+                 audio_cache: Optional[str] = None,
+                 word_timestamps: bool = False) -> None:
+        self.info = None
+        self.audio_file = audio_file.path
+        self.audio_name = audio_file.name
+
+        self.chapter_file = audio_file.chapter_file
+        self.srt_file = audio_file.srt_file
+
+        # Batch sizes above 1 run the VAD chunks of a file through the encoder together
+        self.batch_size = batch_size
+        # Greedy decoding (1) uses CTranslate2's fast path; larger beams can help with noisy audio
+        self.beam_size = beam_size
+        # Directory to keep decoded audio in between runs, None decodes every time
+        self.audio_cache = audio_cache
+        # Word timings cost an extra alignment pass per segment and the outputs only use segment timings
+        self.word_timestamps = word_timestamps
         self.segments = None
-        self.batch_segments = None
-        self.model: WhisperModel = WhisperModel(
-            model,
-            device=device,
-            compute_type="int8",
-            num_workers=num_workers,
-            cpu_threads=cpu_threads
-        )
-        self.model.beam_size = 5
-        self.model.vad_filter = True
-        self.model.vad_parameters = {
-            "min_silence_duration_ms": 1000,
-            "speech_pad_ms": 400,
-        }
-        self.model.condition_on_previous_text = True
-        self.model.initial_prompt = "This is an audiobook with chapters."
+        self.segment_count = 0
+        self.srt_buffer: list[str] = []
+        # Output handles stay open for the whole file, see __aenter__
+        self.srt_handle = None
+        self.chapter_handle = None
+        self.model: WhisperModel = model
+        # The batched pipeline keeps per-transcription state, so every file gets its own wrapper
         self.batched_model: BatchedInferencePipeline = BatchedInferencePipeline(self.model)
 
-
-    async def _process_segment(self, segment: Segment, segment_number: int, offset: float, is_batch: bool = False) -> None:
-
-        if segment_number == 0:
-            # First Segment
-            async with aiofiles.open(self.chapter_file, 'a', encoding='utf-8') as f:
-                await f.write(f"00:00:00,0000, BOOK Start\n")
-
-
-        if is_chapter(segment.text):
-            time_hms = format_timestamp_srt(segment.start, offset)
-            print(f"Possible Chapter [{time_hms}] : {segment.text}")
-            async with aiofiles.open(self.chapter_file, 'a', encoding='utf-8') as f:
-                await f.write(f"{time_hms}, {segment.text}\n")
-
-        start_time = format_timestamp_srt(segment.start, offset)
-        end_time = format_timestamp_srt(segment.end, offset)
-
-        if is_batch:
-            # This needs to be sorted when done.
-            async with aiofiles.open(self.batch_srt_file, 'a', encoding='utf-8') as f:
-                await f.write(f"{segment_number}\n{start_time} --> {end_time}\n{(segment.text.strip())}\n\n")
-
+    async def __aenter__(self) -> "FileTranscriber":
+        # Opening in write mode also clears anything left behind by an interrupted run
+        self.srt_handle = await aiofiles.open(self.srt_file, 'w', encoding='utf-8', buffering=1 << 16)
+        self.chapter_handle = await aiofiles.open(self.chapter_file, 'w', encoding='utf-8')
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.srt_handle.close()
+        await self.chapter_handle.close()
+
+    async def _process_segment(self, segment: Segment) -> None:
+        # The batched pipeline passes on segments without any text, they would be empty SRT entries
+        if not segment.text.strip():
+            return
+        self.segment_count += 1
+        # Keep every segment on one line of the part files
+        text = " ".join(segment.text.splitlines())
+
+        if is_chapter(text):
+            console.print(f"Possible Chapter {self.audio_name} [{format_timestamp_srt(segment.start)}] : {text}",
+                          markup=False)
+            await self.chapter_handle.write(f"{segment.start!r}\t{text}\n")
+
+        # Queue the entry and write the buffer out in one go once it is full
+        self.srt_buffer.append(f"{segment.start!r}\t{segment.end!r}\t{text.strip()}\n")
+        if len(self.srt_buffer) >= SRT_FLUSH_SEGMENTS:
+            await self._flush_srt()
+
+    async def _write_segments(self, queue: asyncio.Queue) -> None:
+        # Consumer side of transcribe_with_progress, a None marks the end of the file
+        while (item := await queue.get()) is not None:
+            await self._process_segment(item)
+
+    async def _flush_srt(self) -> None:
+        if not self.srt_buffer:
+            return
+        await self.srt_handle.write("".join(self.srt_buffer))
+        self.srt_buffer.clear()
+
+
+
+    def _decode_audio(self) -> np.ndarray:
+        """Decode the file to 16kHz mono float32 PCM, the array transcribe would otherwise decode itself.
+
+        With an audio cache the array is saved on the first run and memory mapped on later ones.
+        """
+        sampling_rate = self.model.feature_extractor.sampling_rate
+        if self.audio_cache is None:
+            return decode_audio(self.audio_file, sampling_rate=sampling_rate)
+
+        # Key on size and mtime as well as the path, so a replaced file gets decoded again
+        stat = os.stat(self.audio_file)
+        key = f"{os.path.abspath(self.audio_file)}:{stat.st_size}:{stat.st_mtime_ns}:{sampling_rate}"
+        cache_file = os.path.join(self.audio_cache, hashlib.sha1(key.encode()).hexdigest() + ".npy")
+        try:
+            # Copy on write, so nothing transcribe does to the array can reach the cache
+            return np.load(cache_file, mmap_mode='c')
+        except FileNotFoundError:
+            pass
+
+        audio = decode_audio(self.audio_file, sampling_rate=sampling_rate)
+        os.makedirs(self.audio_cache, exist_ok=True)
+        with open(cache_file + PART_SUFFIX, 'wb') as cache:
+            np.save(cache, audio)
+        os.replace(cache_file + PART_SUFFIX, cache_file)
+        return audio
+
+    async def transcribe_with_progress(self, progress: Progress) -> tuple[int, float]:
+        """Transcribe the file, returning the number of segments written and the audio duration.
+
+        Must be called inside ``async with`` so the output files are open.
+        """
+        task = progress.add_task(self.audio_name, total=100, status="Starting...")
+        options = {
+            'beam_size': self.beam_size,
+            # Let VAD cut out silences so the decoder never runs over padded quiet stretches
+            'vad_filter': True,
+            'vad_parameters': VAD_PARAMETERS,
+            # Chapter titles do not depend on the text before them, so skip conditioning on it
+            'condition_on_previous_text': False,
+            'initial_prompt': INITIAL_PROMPT,
+            # Chapter detection only knows English titles, fixing the language also skips detecting it
+            'language': 'en',
+            'word_timestamps': self.word_timestamps,
+        }
+        # Decoding and the VAD pass inside transcribe run before the first segment, keep them off the event loop too
+        audio = await asyncio.to_thread(self._decode_audio)
+        if self.batch_size > 1:
+            # The batched pipeline otherwise returns each VAD chunk (up to 30s) as a single segment, and
+            # is_chapter only looks at the start of a segment, so keep the timestamps that split it into sentences
+            segments, info = await asyncio.to_thread(
+                self.batched_model.transcribe, audio, batch_size=self.batch_size, without_timestamps=False, **options)
         else:
-            # Write to an output file
-            async with aiofiles.open(self.srt_file, 'a', encoding='utf-8') as f:
-                await f.write(f"{segment_number}\n{start_time} --> {end_time}\n{(segment.text.strip())}\n\n")
+            segments, info = await asyncio.to_thread(self.model.transcribe, audio, **options)
+
+        # The segment generator runs the model, so step it on a thread and let a writer task
+        # handle the file I/O in the meantime
+        queue = asyncio.Queue()
+        writer = asyncio.create_task(self._write_segments(queue))
+        next_update = time.monotonic() + PROGRESS_INTERVAL
+        try:
+            while not writer.done() and (segment := await asyncio.to_thread(next, segments, None)) is not None:
+                queue.put_nowait(segment)
+                # Update progress with current segment text, at most every PROGRESS_INTERVAL seconds
+                now = time.monotonic()
+                if now >= next_update:
+                    progress.update(
+                        task,
+                        completed=round((segment.end / info.duration * 100), 1),
+                        status=f"Transcribing: {segment.text[:50]}..."
+                    )
+                    next_update = now + PROGRESS_INTERVAL
+        finally:
+            queue.put_nowait(None)
+            await writer
+        await self._flush_srt()
+        progress.remove_task(task)
+        return self.segment_count, info.duration
+
+
+async def _transcribe_file_in_process_async(model: WhisperModel, audio_file: AudioFile,
+                                            file_options: dict) -> tuple[int, float]:
+    async with FileTranscriber(audio_file, model, **file_options) as t:
+        # The parent owns the progress display, so a worker process reports through a hidden one
+        return await t.transcribe_with_progress(Progress(disable=True))
+
+
+def _transcribe_file_in_process(model_config: dict, file_options: dict, audio_file: AudioFile) -> tuple[int, float]:
+    # Runs in a worker process; load_model caches, so each process builds its engine once
+    model = load_model(**model_config)
+    segment_count, duration = asyncio.run(
+        _transcribe_file_in_process_async(model, audio_file, file_options))
+    console.print(f"Transcribed {audio_file.path} with {segment_count} segments ({duration:.1f} seconds).")
+    return segment_count, duration
+
+
+def _init_process(to_stderr: bool) -> None:
+    # A spawned process starts with a fresh console, so follow the parent when it moved its output
+    # to stderr (chapterize serve keeps stdout for its status lines)
+    if to_stderr:
+        console.file = sys.stderr
+
+
+@functools.lru_cache(maxsize=1)
+def _process_pool(processes: int, to_stderr: bool) -> ProcessPoolExecutor:
+    # Kept open for the rest of the run, so the models the processes load stay loaded between books.
+    # Spawn rather than fork, as the parent is running the live display thread.
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_process, initargs=(to_stderr,))
 
 
-
-    async def batch_transcribe_with_progress(self, offset_index: int = 0, offset_seconds:float = 0.0)  -> tuple[int, float]:
-        console.print("Starting Batch transcription of audio files...")
-        progress = Progress(
-            SpinnerColumn(),
-            TextColumn("[bold blue]{task.description}"),
-            BarColumn(bar_width=50),
-            TaskProgressColumn(),
-            TimeRemainingColumn(),
-            TextColumn("[bold]{task.fields[status]}"),
-            console=console  # Using the console you already defined at module level
-        )
-        with Live(progress, refresh_per_second=10):
-            task = progress.add_task(f"{self.audio_file}", total=100, status="Starting...")
-            segments, info = self.batched_model.transcribe(self.audio_file)
-
-            for index, segment in enumerate(segments, offset_index):
-                percent = round((segment.end / info.duration * 100), 1)
-                await self._process_segment(segment, index, offset_seconds, is_batch=True)
-                # Update progress with current segment text
-                progress.update(
-                    task,
-                    completed=percent,
-                    status=f"Transcribing: {segment.text[:50]}..."
-                )
-
-        return index, info.duration
-
-
-
-    async def transcribe_with_progress(self, offset_index: int = 0, offset_seconds:float = 0.0)  -> tuple[int, float]:
-
-        progress = Progress(
-            SpinnerColumn(),
-            TextColumn("[bold blue]{task.description}"),
-            BarColumn(bar_width=50),
-            TaskProgressColumn(),
-            TimeRemainingColumn(),
-            TextColumn("[bold]{task.fields[status]}"),
-            console=console  # Using the console you already defined at module level
-        )
-        with Live(progress, refresh_per_second=10):
-            task = progress.add_task(f"{self.audio_file}", total=100, status="Starting...")
-            segments, info = self.model.transcribe(self.audio_file)
-
-            for index, segment in enumerate(segments, offset_index):
-                percent = round((segment.end / info.duration * 100), 1)
-                await self._process_segment(segment, index, offset_seconds, is_batch=False)
-                # Update progress with current segment text
-                progress.update(
-                    task,
-                    completed=percent,
-                    status=f"Transcribing: {segment.text[:50]}..."
-                )
-        return index + 1, info.duration + offset_seconds
-
 class BookTranscriber:
-    def __init__(self, directory: str, model: str = 'tiny.en', device: str = 'auto',
-                 num_workers: int = 8, cpu_threads: int = 0) -> None:
+    def __init__(self, directory: str, model: str = 'distil-small.en', device: str = 'auto', compute_type: str = 'auto',
+                 num_workers: int = 8, cpu_threads: int = 0, batch_size: int = 0, beam_size: int = 1,
+                 processes: int = 1, audio_cache: Optional[str] = None, no_tui: bool = False,
+                 fit_model_to_book: bool = True) -> None:
         self.directory = directory
         self.model_config = {
             'model': model,
             'device': device,
+            'compute_type': compute_type,
             'num_workers': num_workers,
             'cpu_threads': cpu_threads
         }
-        self.audio_files = self._get_audio_files()
+        # Batching keeps a GPU busy but costs some chapter accuracy and buys little on a CPU,
+        # so by default only batch on CUDA
+        if batch_size == 0:
+            batch_size = DEFAULT_GPU_BATCH_SIZE if resolve_device(device) == "cuda" else 1
+        # Passed on to every FileTranscriber
+        self.file_options = {
+            'batch_size': batch_size,
+            'beam_size': beam_size,
+            'audio_cache': audio_cache
+        }
+        self.processes = processes
+        # Size the model for this book's file count; chapterize serve turns this off to keep one model for every book
+        self.fit_model_to_book = fit_model_to_book
+        # Skip the live progress display for headless runs (cron, CI, piped output)
+        self.tui = console.is_terminal and not no_tui
+
+        # The book wide results are named after the book directory
+        self.book_name = os.path.basename(os.path.normpath(directory))
+        self.chapter_file = os.path.join(directory, self.book_name + ".chapters")
+        self.srt_file = os.path.join(directory, self.book_name + ".srt")
+
+        self.audio_files, self.transcription_files = self._scan_directory()
         self._clean_detection_files()
         console.print(f"Found {len(self.audio_files)} audio files in {self.directory}")
 
-    def _clean_detection_files(self):
-        console.print("Cleaning up detection files...")
-        for transcription_file in self._get_transcription_files():
-            try:
-                os.remove(f'{transcription_file}')
-                console.print(f"Removed {transcription_file}")
-            except FileNotFoundError:
-                pass
-
-    def _get_transcription_files(self) -> list:
-        # Define the audio file extensions to look for
-        audio_extensions = ['**/*.srt', '**/*.chapters']
+    def _clean_detection_files(self) -> None:
+        # The scan only lists files that exist, so the only misses are files removed since then
+        removed = 0
+        for transcription_file in self.transcription_files:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(transcription_file)
+                removed += 1
+        if removed:
+            console.print(f"Removed {removed} detection file(s) left by an earlier run")
+
+    def _scan_directory(self) -> tuple[list[AudioFile], list[str]]:
+        """Walk the book directory once, collecting its audio files and any earlier detection files."""
         audio_files = []
-
-        # Search for audio files with the specified extensions
-        for ext in audio_extensions:
-            audio_files.extend(glob(os.path.join(self.directory, ext)))
-
-        # Sort the audio files
-        audio_files.sort()
-        return audio_files
-
-
-    def _get_audio_files(self) -> list:
-        # Define the audio file extensions to look for
-        audio_extensions = ['**/*.mp3', '**/*.ogg', '**/*.m4a', '**/*.wav', '**/*.flac', '**/*.m4b']
-        audio_files = []
-
-        # Search for audio files with the specified extensions
-        for ext in audio_extensions:
-            audio_files.extend(glob(os.path.join(self.directory, ext), recursive=True))
+        transcription_files = []
+
+        # Walk the directory tree with scandir so each entry's cached type info is reused
+        directories = deque([self.directory])
+        while directories:
+            with os.scandir(directories.popleft()) as entries:
+                for entry in entries:
+                    # Skip hidden files such as macOS "._" resource forks, like glob does
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                        continue
+                    extension = os.path.splitext(entry.name)[1].lower()
+                    if extension in AUDIO_EXTENSIONS:
+                        # Per-file results are only ever partial, they get merged into the book files
+                        audio_files.append(AudioFile(
+                            path=entry.path,
+                            name=entry.name,
+                            srt_file=f"{entry.path}.srt{PART_SUFFIX}",
+                            chapter_file=f"{entry.path}.chapters{PART_SUFFIX}"
+                        ))
+                    elif entry.name.endswith(DETECTION_SUFFIXES):
+                        # Only this tool's own part files. The book .srt/.chapters from an earlier run are
+                        # kept until the merge replaces them, so a failed rerun does not lose them.
+                        transcription_files.append(entry.path)
 
         # Sort the audio files
-        audio_files.sort()
-        return audio_files
-
+        audio_files.sort(key=lambda audio_file: audio_file.path)
+        return audio_files, transcription_files
+
+
+    async def _transcribe_file_async(self, model: WhisperModel, audio_file: AudioFile,
+                                     progress: Progress) -> tuple[int, float]:
+        async with FileTranscriber(audio_file, model, **self.file_options) as t:
+            return await t.transcribe_with_progress(progress)
+
+    def _transcribe_file(self, model: WhisperModel, audio_file: AudioFile, progress: Progress) -> tuple[int, float]:
+        # Runs on a worker thread, which needs its own event loop for the aiofiles writes
+        segment_count, duration = asyncio.run(self._transcribe_file_async(model, audio_file, progress))
+        console.print(f"Transcribed {audio_file.path} with {segment_count} segments ({duration:.1f} seconds).")
+        return segment_count, duration
+
+    @staticmethod
+    def _shift_srt(lines: list[str], offset_index: int, offset_seconds: float) -> str:
+        buffer = []
+        for number, line in enumerate(lines, offset_index + 1):
+            start_time, end_time, text = line.rstrip("\n").split("\t", 2)
+            buffer.append(
+                f"{number}\n"
+                f"{format_timestamp_srt(float(start_time), offset_seconds)} --> "
+                f"{format_timestamp_srt(float(end_time), offset_seconds)}\n"
+                f"{text}\n\n"
+            )
+        return "".join(buffer)
+
+    @staticmethod
+    def _shift_chapters(lines: list[str], offset_seconds: float) -> str:
+        buffer = []
+        for line in lines:
+            start_time, title = line.rstrip("\n").split("\t", 1)
+            buffer.append(f"{format_timestamp_srt(float(start_time), offset_seconds)}, {title}\n")
+        return "".join(buffer)
+
+    async def _merge_transcriptions(self, results: list[tuple[int, float]]) -> float:
+        """Join the per-file transcriptions into the book files, shifting each by the files before it."""
+        # Prefix sums give every file its starting segment index and time, the final entry is the book total
+        offsets = list(itertools.accumulate(
+            results, lambda total, result: (total[0] + result[0], total[1] + result[1]), initial=(0, 0.0)))
+        book_duration = offsets[-1][1]
+
+        # Write next to the final files and only swap them in once complete, so an interrupted
+        # run never leaves a half written book .srt/.chapters behind for the upload step
+        srt_part, chapter_part = f"{self.srt_file}{PART_SUFFIX}", f"{self.chapter_file}{PART_SUFFIX}"
+        async with aiofiles.open(srt_part, 'w', encoding='utf-8') as srt, \
+                aiofiles.open(chapter_part, 'w', encoding='utf-8') as chapters:
+            await chapters.write(f"00:00:00,0000, BOOK Start\n")
+
+            for audio_file, (offset_index, offset_seconds) in zip(self.audio_files, offsets):
+                if os.path.exists(audio_file.srt_file):
+                    async with aiofiles.open(audio_file.srt_file, 'r', encoding='utf-8') as f:
+                        await srt.write(self._shift_srt(await f.readlines(), offset_index, offset_seconds))
+                    os.remove(audio_file.srt_file)
+
+                if os.path.exists(audio_file.chapter_file):
+                    async with aiofiles.open(audio_file.chapter_file, 'r', encoding='utf-8') as f:
+                        await chapters.write(self._shift_chapters(await f.readlines(), offset_seconds))
+                    os.remove(audio_file.chapter_file)
+
+            # Write the duration to the chapter files.
+            await chapters.write(f"{format_timestamp_srt(book_duration)}, BOOK_END\n")
+
+            for f in (srt, chapters):
+                await f.flush()
+                os.fsync(f.fileno())
+
+        os.replace(srt_part, self.srt_file)
+        os.replace(chapter_part, self.chapter_file)
+        return book_duration
+
+    def _process_model_config(self) -> dict:
+        # Every process transcribes one file at a time, so it needs a single model worker and
+        # an even share of the CPU cores instead of the whole machine
+        cpu_threads = self.model_config['cpu_threads'] or max(1, (os.cpu_count() or 1) // self.processes)
+        return {**self.model_config, 'num_workers': 1, 'cpu_threads': cpu_threads}
+
+    def _create_executor(self, progress: Progress) -> tuple[ContextManager[Executor],
+                                                            Callable[[AudioFile], tuple[int, float]], int]:
+        if self.processes > 1:
+            # Separate processes each load their own model, which scales CPU transcription past
+            # what one CTranslate2 engine gets out of its workers. The pool outlives the book, so
+            # it is not shut down here.
+            workers = max(1, min(self.processes, len(self.audio_files)))
+            executor = contextlib.nullcontext(_process_pool(self.processes, console.file is sys.stderr))
+            worker = functools.partial(_transcribe_file_in_process, self._process_model_config(), self.file_options)
+        else:
+            # Files run concurrently on one model: CTranslate2 serves up to num_workers transcribe calls at once.
+            # On a single GPU the kernels still serialize, so the gain there is mostly overlapping audio decoding.
+            workers = max(1, min(self.model_config['num_workers'], len(self.audio_files)))
+            if self.fit_model_to_book:
+                # Size the model for the files that actually run at once, so a book with fewer files than
+                # num_workers (a single .m4b) gets all the cores instead of a num_workers share of them
+                model = load_model(**{**self.model_config, 'num_workers': workers})
+            else:
+                # Keep the load_model cache key the same from book to book, so the model is only loaded once
+                model = load_model(**self.model_config)
+            executor = ThreadPoolExecutor(max_workers=workers)
+            worker = functools.partial(self._transcribe_file, model, progress=progress)
+        return executor, worker, workers
 
     async def transcribe(self) -> None:
-        offset_seconds: float = 0.0
-        offset_index: int = 0
-
-
-        for audio_file in self.audio_files:
-            t = FileTranscriber(audio_file)
-            console.print(f"Transcribing with offset {offset_index} and index {offset_index}")
-            offset_index, offset_seconds = await t.transcribe_with_progress(offset_index, offset_seconds)
-            console.print(f"Transcribed {audio_file} with {offset_index} segments and {offset_seconds} seconds offset.")
-            chapter_file = t.chapter_file
 
-        # When we are done the final info is:
-        book_duration = offset_seconds
-
-        # Write the duration to the chapter files.
-        async with aiofiles.open(chapter_file, 'a', encoding='utf-8') as f:
-            await f.write(f"{format_timestamp_srt(book_duration,0)}, BOOK_END\n")
-
-
-        console.print(f"Finished transcription. Please review {chapter_file} for errors")
+        progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[bold blue]{task.description}"),
+            BarColumn(bar_width=50),
+            TaskProgressColumn(),
+            TimeRemainingColumn(),
+            TextColumn("[bold]{task.fields[status]}"),
+            console=console,  # Using the console you already defined at module level
+            disable=not self.tui
+        )
+        executor_context, worker, workers = self._create_executor(progress)
+        with Live(progress, refresh_per_second=2) if self.tui else contextlib.nullcontext():
+            book_task = progress.add_task(self.book_name, total=len(self.audio_files),
+                                          status=f"{workers} file(s) at a time")
+            with executor_context as executor:
+                jobs = []
+                try:
+                    for audio_file in self.audio_files:
+                        job = executor.submit(worker, audio_file)
+                        job.add_done_callback(lambda _: progress.advance(book_task))
+                        jobs.append(job)
+                    results = await asyncio.gather(*map(asyncio.wrap_future, jobs))
+                except BrokenProcessPool:
+                    # A worker process died (killed for memory, crashed in CTranslate2), which breaks the
+                    # whole pool; drop it so the next book (chapterize serve) starts a fresh one
+                    _process_pool.cache_clear()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                except BaseException:
+                    # Drop the files that have not started, or the thread pool would transcribe
+                    # every one of them on shutdown before the error gets reported
+                    for job in jobs:
+                        job.cancel()
+                    raise
+
+        book_duration = await self._merge_transcriptions(results)
+        console.print(f"Transcribed {book_duration:.1f} seconds of audio.")
+        console.print(f"Finished transcription. Please review {self.chapter_file} for errors")
@@ -1,3 +1,6 @@
+import functools
+import itertools
+import re
 from dataclasses import dataclass
 from typing import List
 
@@ -9,85 +12,81 @@ class BookChapter:
     title: str
 
 
+@dataclass(frozen=True)
+class AudioFile:
+    """An audio file of a book, with the names derived from its path worked out once at discovery."""
+    path: str
+    name: str
+    srt_file: str
+    chapter_file: str
+
+
+# Common chapter indicators, compiled once into a single alternation that has to end on a word boundary
+CHAPTER_PATTERN = re.compile(
+    r"(?:chapter|part|book|section|prolog(?:ue)?|epilog(?:ue)?|introduction|interlude"
+    r"|intermission|afterword|foreword|preface|appendix)\b"
+)
+
+# Roman numerals from i up to cccxcix, more than enough chapters for any book
+ROMAN_NUMERAL_PATTERN = re.compile(r"(?=[ivxlc])c{0,3}(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3})")
+
+
+# Short utterances ("Chapter one.", "Yes.", silence transcribed as "") come up again and again in a book
+@functools.lru_cache(maxsize=16384)
 def is_chapter(text: str) -> bool:
     # Convert text to lowercase and strip whitespace
     text = text.lower().strip()
 
-    # Common chapter indicators
-    chapter_patterns = {
-        "chapter ",
-        "part ",
-        "book ",
-        "section ",
-        "prologue",
-        "prolog",
-        "epilogue",
-        "epilog",
-        "introduction",
-        "interlude",
-        "intermission",
-        "afterword",
-        "foreword",
-        "preface",
-        "appendix"
-    }
-
-    roman_numerals = {"i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x"}
-
-    return any((
-        text.startswith(pattern) for pattern in chapter_patterns
-                                                or text.isdigit()
-                                                or text in roman_numerals
-    ))
-
-def format_timestamp_srt(seconds: float, offset: float) -> str:
-    seconds += offset
-    milliseconds = int((seconds % 1) * 1000)
-    seconds = int(seconds)
-    minutes, seconds = divmod(seconds, 60)
-    hours, minutes = divmod(minutes, 60)
-    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
-
+    if CHAPTER_PATTERN.match(text):
+        return True
 
-def parse_timestamp_srt(timestamp):
-    # Split hours, minutes, seconds and milliseconds
-    hours, minutes, seconds_ms = timestamp.split(':')
-    seconds, milliseconds = seconds_ms.split(',')
+    # A bare number such as "12" or "XII." read out on its own
+    number = text.rstrip(".:,")
+    return number.isdigit() or ROMAN_NUMERAL_PATTERN.fullmatch(number) is not None
 
-    # Convert everything to integers
-    hours = int(hours)
-    minutes = int(minutes)
-    seconds = int(seconds)
-    milliseconds = int(milliseconds)
+def format_timestamp_srt(seconds: float, offset: float = 0.0) -> str:
+    # Work in whole milliseconds so only integer divmods are needed
+    return _format_milliseconds(int((seconds + offset) * 1000 + 0.5))
 
-    # Calculate total seconds
-    total_seconds = hours * 3600 + minutes * 60 + seconds + milliseconds / 1000
-
-    return total_seconds
 
+# A segment usually ends exactly where the next one starts, so timestamps repeat a lot
+@functools.lru_cache(maxsize=4096)
+def _format_milliseconds(milliseconds: int) -> str:
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
 
-def parse_chapter_file(chapter_file: str) -> List[BookChapter]:
-    chapters: List[BookChapter] = []
 
-    with open(chapter_file, 'r', encoding='utf-8') as file:
-        lines = [line.strip() for line in file if line.strip()]
+# HH:MM:SS,mmm as written in .srt and .chapters files
+TIMESTAMP_PATTERN = re.compile(r"\s*(\d+):(\d+):(\d+),(\d+)")
 
-    for i, line in enumerate(lines[:-1]):  # Exclude the BOOK_END line
-        timestamp, milliseconds, title = line.split(',', 2)  # Split only first two commas
-        full_timestamp = f"{timestamp},{milliseconds}"
 
-        start_time = parse_timestamp_srt(full_timestamp)
+def parse_timestamp_srt(timestamp: str) -> float:
+    # Split hours, minutes, seconds and milliseconds in one match
+    match = TIMESTAMP_PATTERN.match(timestamp)
+    if match is None:
+        # .chapters files get edited by hand, so point at the timestamp that is off
+        raise ValueError(f"Invalid timestamp {timestamp!r}, expected HH:MM:SS,mmm")
+    hours, minutes, seconds, milliseconds = map(int, match.groups())
 
-        # Get next line's timestamp for end time
-        next_timestamp, next_ms, _ = lines[i + 1].split(',', 2)
-        next_full_timestamp = f"{next_timestamp},{next_ms}"
-        end_time = parse_timestamp_srt(next_full_timestamp)
+    # Calculate total seconds
+    return hours * 3600 + minutes * 60 + seconds + milliseconds / 1000
 
-        chapters.append(BookChapter(
-            id=i + 1,
-            start=start_time,
-            end=end_time,
-            title=title.strip()  # Remove any leading/trailing whitespace from title
-        ))
 
-    return chapters
\ No newline at end of file
+def parse_chapter_file(chapter_file: str) -> List[BookChapter]:
+    # Parse every line once, each chapter then ends where the next line starts
+    timestamps = []
+    with open(chapter_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            timestamp, milliseconds, title = line.split(',', 2)  # Split only first two commas
+            timestamps.append((parse_timestamp_srt(f"{timestamp},{milliseconds}"), title.strip()))
+
+    # Pairing each line with the next one also leaves the BOOK_END line out as a chapter
+    return [
+        BookChapter(id=i, start=start_time, end=end_time, title=title)
+        for i, ((start_time, title), (end_time, _)) in enumerate(itertools.pairwise(timestamps), 1)
+    ]